@@ -1,199 +1,474 @@
 import yt_dlp
-import os
-import streamlit as st
 import re
-from urllib.parse import urlparse, parse_qs
-from PIL import Image
+import streamlit as st
 import requests
 import logging
 import threading
+import time
+from functools import partial
+import asyncio
+import subprocess
+import shutil
+import mimetypes
+from pathlib import Path
+from contextlib import contextmanager
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 # Define the main download folder and subfolders
-DOWNLOAD_FOLDER = os.path.join(os.getcwd(), "youtube_downloads")
-VIDEO_FOLDER = os.path.join(DOWNLOAD_FOLDER, "Videos")
-AUDIO_FOLDER = os.path.join(DOWNLOAD_FOLDER, "Audio")
+DOWNLOAD_FOLDER = Path.cwd() / "youtube_downloads"
+VIDEO_FOLDER = DOWNLOAD_FOLDER / "Videos"
+AUDIO_FOLDER = DOWNLOAD_FOLDER / "Audio"
+
+# Largest file offered through the browser download button (200 MB)
+DOWNLOAD_BUTTON_LIMIT = 200 * 1024 * 1024
 
-# Ensure the folders exist
+# Ensure the folders exist (once per process; cached across script reruns)
+@st.cache_resource
 def create_folders():
     """Creates the main download folder and subfolders if they don't exist."""
-    os.makedirs(DOWNLOAD_FOLDER, exist_ok=True)
-    os.makedirs(VIDEO_FOLDER, exist_ok=True)
-    os.makedirs(AUDIO_FOLDER, exist_ok=True)
-
-# Function to sanitize filenames
-def sanitize_filename(filename):
-    """Sanitize the filename by removing invalid characters."""
-    sanitized = re.sub(r'[<>:"/\\|?*\x00-\x1F\x7F\[\],#]', '_', filename)
-    sanitized = sanitized.replace(" ", "_")
-    max_length = 255  # Leave room for the file extension
-    if len(sanitized) > max_length:
-        sanitized = sanitized[:max_length]
-    return sanitized
-
-# Function to update the progress bar
-def update_progress(d, progress_bar, stop_event):
-    """Update the progress bar based on download status."""
-    if stop_event.is_set():
+    DOWNLOAD_FOLDER.mkdir(parents=True, exist_ok=True)
+    VIDEO_FOLDER.mkdir(exist_ok=True)
+    AUDIO_FOLDER.mkdir(exist_ok=True)
+
+create_folders()
+
+# Function to build the progress hook for one download
+def make_progress_hook(progress_bar, stop_event):
+    """Returns a yt-dlp progress hook bound to `progress_bar` and `stop_event`.
+
+    Redraws are coalesced to at most 10 per second and only on >=1% changes;
+    the last draw time and value live in the closure.
+    """
+    last_time = 0.0
+    last_value = -1.0
+    def hook(d):
+        nonlocal last_time, last_value
+        if stop_event.is_set():
+            raise Exception("Download cancelled by user.")
+        if d['status'] == 'finished':
+            # Always draw completion; the throttle may have dropped the last ticks
+            last_time, last_value = time.monotonic(), 1.0
+            progress_bar.progress(1.0)
+            return
+        if d['status'] != 'downloading':
+            return
+        now = time.monotonic()
+        if now - last_time < 0.1:
+            return
+        total = d.get('total_bytes') or d.get('total_bytes_estimate')
+        if not total:
+            return
+        progress_value = min(d.get('downloaded_bytes', 0) / total, 1.0)
+        # abs() so a new stream restarting from 0 still redraws
+        if abs(progress_value - last_value) < 0.01:
+            return
+        last_time, last_value = now, progress_value
+        progress_bar.progress(progress_value)
+    return hook
+
+# Function to surface an error from a download function
+def report_error(progress_bar, message):
+    """Shows `message` on the download's progress target, or on the page if there is none."""
+    (progress_bar if progress_bar is not None else st).error(message)
+
+# Function to honour cancellation from worker threads
+def check_cancelled(d, stop_event):
+    """Abort a worker-thread download once the user has cancelled."""
+    if stop_event is not None and stop_event.is_set():
         raise Exception("Download cancelled by user.")
-    if d['status'] == 'downloading' and '_percent_str' in d:
-        percentage = d['_percent_str']
-        cleaned_percentage = ''.join(filter(lambda x: x.isdigit() or x == '%', percentage))
-        try:
-            progress_value = int(cleaned_percentage.strip('%')) / 100
-            progress_bar.progress(progress_value)
-        except ValueError:
-            progress_bar.progress(0)
 
-# Function to download video/audio
-def download_best_stream(url, format_option="bv*+ba/best", progress_bar=None, stop_event=None):
-    """Downloads the best available stream (video + audio)."""
-    create_folders()  # Ensure folders exist
+# aria2c opens several connections per file; offered as an opt-in when installed
+_HAS_ARIA2C = shutil.which('aria2c') is not None
+
+# Builders for the yt-dlp option dicts used by the download functions
+def _opts_video(format_option, outtmpl, fragments=8, use_aria2c=False):
+    """Options for a video download saved under `outtmpl`, fetching `fragments` pieces in parallel.
 
-    # Proceed with the download
+    With `use_aria2c` the transfer is handed to aria2c, which reports no
+    progress until the file is done, so the progress bar and Cancel (both
+    driven by progress hooks) stop working for that download.
+    """
     ydl_opts = {
-        'outtmpl': f'{VIDEO_FOLDER}/%(title)s.%(ext)s',  # Save in Videos subfolder
+        'outtmpl': outtmpl,
         'format': format_option,
-        'progress_hooks': [lambda d: update_progress(d, progress_bar, stop_event)] if progress_bar else [],
+        'concurrent_fragment_downloads': fragments,
+        'http_chunk_size': 10 * 1024 * 1024,
     }
+    if use_aria2c:
+        ydl_opts['external_downloader'] = {'default': 'aria2c'}
+    return ydl_opts
+
+def _opts_audio():
+    """Options for fetching the raw best audio stream."""
+    return {'outtmpl': str(AUDIO_FOLDER / '%(title)s.%(ext)s'), 'format': 'bestaudio/best'}
+
+_OPTS_FLAT = {'extract_flat': 'in_playlist', 'quiet': True}
+
+# Idle YoutubeDL instances keyed by their options, reused across downloads
+_YDL_POOL_MAX_KEYS = 8  # Option sets kept, least recently used evicted first
+_YDL_POOL_MAX_IDLE = 4  # Idle instances kept per option set
+
+@st.cache_resource
+def _ydl_pool():
+    """Returns the shared LRU pool and its lock; cached so it survives script reruns."""
+    return OrderedDict(), threading.Lock()
+
+@contextmanager
+def cached_ydl(opts, progress_hooks=(), post_hooks=()):
+    """Checks out a reusable YoutubeDL for `opts`, attaching hooks for this download only.
+
+    Building a YoutubeDL initialises its extractors, so instances are kept
+    per option set instead of being rebuilt on every call. An instance is
+    only ever used by one thread at a time. `playlist_items` is left out of
+    the key and set per checkout, so playlist shards share one option set.
+
+    YoutubeDL keeps and mutates the dict it is built from, so each instance
+    gets its own copy and the key is computed before construction.
+    """
+    key = repr(sorted((k, v) for k, v in opts.items() if k != 'playlist_items'))
+    pool, pool_lock = _ydl_pool()
+    with pool_lock:
+        idle = pool.get(key)
+        ydl = idle.pop() if idle else None
+    if ydl is None:
+        ydl = yt_dlp.YoutubeDL(dict(opts))
+    ydl.params['playlist_items'] = opts.get('playlist_items')
+    for hook in progress_hooks:
+        ydl.add_progress_hook(hook)
+    for hook in post_hooks:
+        ydl.add_post_hook(hook)
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # Extract video info
+        yield ydl
+    finally:
+        ydl._progress_hooks.clear()
+        ydl._post_hooks.clear()
+        evicted = []
+        with pool_lock:
+            idle = pool.setdefault(key, [])
+            pool.move_to_end(key)
+            if len(idle) < _YDL_POOL_MAX_IDLE:
+                idle.append(ydl)
+            else:
+                evicted.append(ydl)
+            while len(pool) > _YDL_POOL_MAX_KEYS:
+                evicted.extend(pool.popitem(last=False)[1])
+        for stale in evicted:
+            stale.close()
+
+# Sync shim so the Streamlit button handler can drive async pipelines
+def run_async(coro):
+    """Runs `coro` to completion, surfacing the first failure instead of an ExceptionGroup."""
+    try:
+        return asyncio.run(coro)
+    except ExceptionGroup as eg:
+        first = eg
+        while isinstance(first, ExceptionGroup):
+            first = first.exceptions[0]
+        raise first from eg
+
+# Function to tell whether a flat playlist entry is itself a playlist/tab
+def _is_playlist_entry(entry):
+    """True for nested playlists, such as the tabs listed under a channel root URL."""
+    return entry.get('_type') == 'playlist' or entry.get('ie_key') == 'YoutubeTab'
+
+# Function to download a playlist/channel as N interleaved shards
+def run_concurrent_download(url, opts, concurrency=4, progress_hooks=(), progress_bar=None):
+    """Downloads every playlist/channel entry with at most `concurrency` in flight.
+
+    The entries are split into `concurrency` shards using yt-dlp's
+    playlist_items step syntax ("1::4", "2::4", ...), each downloaded by its
+    own YoutubeDL on a worker thread. Single videos and playlists of
+    playlists are downloaded as one unsharded job.
+    """
+    with cached_ydl(_OPTS_FLAT) as ydl:
+        info_dict = ydl.extract_info(url, download=False, process=False)
+        # Follow redirects such as watch?v=...&list=... to the playlist itself
+        for _ in range(3):
+            if info_dict.get('_type') not in ('url', 'url_transparent'):
+                break
+            url = info_dict['url']
+            info_dict = ydl.extract_info(url, download=False, process=False)
+    entries = info_dict.get('entries')
+    if info_dict.get('_type') not in ('playlist', 'multi_video') or entries is None:
+        # A single video: playlist_items would be ignored, so don't shard
+        n_entries = None
+        n_shards = 1
+    else:
+        entries = list(entries)
+        if not entries:
+            raise yt_dlp.DownloadError("No entries found for this URL.")
+        if any(_is_playlist_entry(e) for e in entries):
+            # e.g. a channel root listing its Videos/Shorts/Live tabs: yt-dlp
+            # applies playlist_items at every level, so shards would skip videos
+            n_entries = None
+            n_shards = 1
+        else:
+            n_entries = len(entries)
+            n_shards = min(concurrency, n_entries)
+
+    completed = 0
+    first_error = None
+    lock = threading.Lock()
+    abort = threading.Event()  # Stops sibling shards once one of them fails
+
+    def on_file(path):
+        nonlocal completed
+        with lock:
+            completed += 1
+            if progress_bar:
+                progress_bar.progress(min(completed / (n_entries or 1), 1.0))
+
+    def download_shard(shard):
+        nonlocal first_error
+        hooks = [*progress_hooks, partial(check_cancelled, stop_event=abort)]
+        if progress_bar and n_entries is None:
+            # No entry count to report, so show per-stream progress instead
+            hooks.append(make_progress_hook(progress_bar, abort))
+        try:
+            with cached_ydl({**opts, 'playlist_items': shard}, hooks, [on_file]) as ydl:
+                ydl.download([url])
+        except Exception as e:
+            with lock:
+                if first_error is None:
+                    first_error = e
+            abort.set()
+
+    with ThreadPoolExecutor(max_workers=n_shards) as pool:
+        shards = [f"{i}::{n_shards}" for i in range(1, n_shards + 1)] if n_entries else [None]
+        pool.map(download_shard, shards)
+    if first_error is not None:
+        raise first_error
+
+# Function to download video/audio
+def download_best_stream(url, format_option="bv*+ba/best", progress_bar=None, stop_event=None, fragments=8, use_aria2c=False):
+    """Downloads the best available stream (video + audio)."""
+    ydl_opts = _opts_video(format_option, str(VIDEO_FOLDER / '%(title)s.%(ext)s'), fragments, use_aria2c)  # Save in Videos subfolder
+    hooks = [make_progress_hook(progress_bar, stop_event)] if progress_bar else []
+    try:
+        with cached_ydl(ydl_opts, hooks) as ydl:
+            # Download and read back the final path chosen by yt-dlp
             info_dict = ydl.extract_info(url, download=True)
-            video_title = info_dict.get('title', 'Untitled')
-            video_ext = info_dict.get('ext', 'mp4')
-            
-            # Sanitize the video title
-            sanitized_title = sanitize_filename(video_title)
-            downloaded_file_path = os.path.join(VIDEO_FOLDER, f"{sanitized_title}.{video_ext}")
+            requested = info_dict.get('requested_downloads') or [{}]
+            downloaded_file_path = Path(requested[0].get('filepath', VIDEO_FOLDER))
 
         logging.info(f"✅ Download completed successfully in: {VIDEO_FOLDER}")
         return downloaded_file_path  # Return the downloaded file path
 
     except yt_dlp.DownloadError as e:
         logging.error(f"❌ Download error: {e}")
-        st.error(f"❌ Download error: {e}")
+        report_error(progress_bar, f"❌ Download error: {e}")
         return None
     except Exception as e:
         logging.error(f"❌ Unexpected error: {e}")
-        st.error(f"❌ Unexpected error: {e}")
+        report_error(progress_bar, f"❌ Unexpected error: {e}")
         return None
 
-# Function to download audio
-def download_audio(url, progress_bar=None, stop_event=None):
-    """Downloads the best available audio stream (MP3)."""
-    create_folders()  # Ensure folders exist
+# Function to fetch the raw audio stream (no post-processing)
+def _fetch_bestaudio(url, on_file, progress_hooks):
+    """Downloads the best audio stream(s) for `url`, calling `on_file` with each finished path."""
+    with cached_ydl(_opts_audio(), progress_hooks, [on_file]) as ydl:  # Save in Audio subfolder
+        ydl.download([url])
 
-    ydl_opts = {
-        'outtmpl': f'{AUDIO_FOLDER}/%(title)s.%(ext)s',  # Save in Audio subfolder
-        'format': 'bestaudio/best',
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '192',
-        }],
-        'progress_hooks': [lambda d: update_progress(d, progress_bar, stop_event)] if progress_bar else [],
-    }
+# Function to transcode a downloaded audio file to MP3
+def _transcode_mp3(path):
+    """Converts `path` to a 192 kbps MP3 with ffmpeg and removes the source file."""
+    src = Path(path)
+    if src.suffix.lower() == '.mp3':
+        return src
+    dst = src.with_suffix('.mp3')
+    subprocess.run(
+        ['ffmpeg', '-y', '-loglevel', 'error', '-i', str(src), '-vn', '-b:a', '192k', str(dst)],
+        check=True,
+    )
+    src.unlink()
+    return dst
+
+# Function to overlap audio downloads with ffmpeg transcoding
+async def _audio_pipeline(url, concurrency, progress_bar=None, stop_event=None):
+    """Downloads on one thread while `concurrency` workers transcode finished files."""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    converted = []
+    abort = threading.Event()  # Set when a consumer fails; stops the download thread
+
+    def on_file(path):
+        # Called from the download thread; blocks while the queue is full
+        future = asyncio.run_coroutine_threadsafe(queue.put(path), loop)
+        while True:
+            try:
+                return future.result(timeout=0.5)
+            except FutureTimeoutError:
+                if abort.is_set():
+                    future.cancel()
+                    raise Exception("Audio conversion failed; download aborted.")
+
+    render = make_progress_hook(progress_bar, stop_event) if progress_bar else None
+
+    def on_progress(d):
+        check_cancelled(d, stop_event)
+        check_cancelled(d, abort)
+        if render:
+            # DownloadJob.progress only stores a value, so no hop to the loop is needed
+            render(d)
+
+    async def producer():
+        try:
+            await asyncio.to_thread(_fetch_bestaudio, url, on_file, [on_progress])
+        finally:
+            # Nobody drains the queue once a consumer has failed
+            if not abort.is_set():
+                for _ in range(concurrency):
+                    await queue.put(None)
+
+    async def consumer(pool):
+        try:
+            while (path := await queue.get()) is not None:
+                converted.append(await loop.run_in_executor(pool, _transcode_mp3, path))
+        except BaseException:
+            abort.set()
+            raise
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(producer())
+            for _ in range(concurrency):
+                tg.create_task(consumer(pool))
+    return converted
+
+# Function to download audio
+def download_audio(url, progress_bar=None, stop_event=None, concurrency=2):
+    """Downloads the best available audio stream(s) and converts them to MP3."""
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info_dict = ydl.extract_info(url, download=True)
-            audio_title = info_dict.get('title', 'Untitled')
-            sanitized_title = sanitize_filename(audio_title)
-            downloaded_file_path = os.path.join(AUDIO_FOLDER, f"{sanitized_title}.mp3")
+        converted = run_async(_audio_pipeline(url, concurrency, progress_bar, stop_event))
         logging.info(f"✅ Audio download completed successfully in: {AUDIO_FOLDER}")
-        return downloaded_file_path
+        # A single video returns its MP3; playlists return the folder
+        return converted[0] if len(converted) == 1 else AUDIO_FOLDER
     except yt_dlp.DownloadError as e:
         logging.error(f"❌ Audio download error: {e}")
-        st.error(f"❌ Audio download error: {e}")
+        report_error(progress_bar, f"❌ Audio download error: {e}")
         return None
     except Exception as e:
         logging.error(f"❌ Unexpected error: {e}")
-        st.error(f"❌ Unexpected error: {e}")
+        report_error(progress_bar, f"❌ Unexpected error: {e}")
         return None
 
 # Function to download playlist
-def download_playlist(url, progress_bar=None, stop_event=None):
-    """Downloads a YouTube playlist."""
-    create_folders()  # Ensure folders exist
-
-    ydl_opts = {
-        'outtmpl': f'{VIDEO_FOLDER}/%(playlist_index)s - %(title)s.%(ext)s',  # Save in Videos subfolder
-        'format': 'bv*+ba/best',
-        'progress_hooks': [lambda d: update_progress(d, progress_bar, stop_event)] if progress_bar else [],
-    }
+def download_playlist(url, progress_bar=None, stop_event=None, concurrency=4, fragments=8, use_aria2c=False):
+    """Downloads a YouTube playlist, fetching several videos at once."""
+    ydl_opts = _opts_video('bv*+ba/best', str(VIDEO_FOLDER / '%(playlist_index)s - %(title)s.%(ext)s'), fragments, use_aria2c)  # Save in Videos subfolder
+    hooks = [partial(check_cancelled, stop_event=stop_event)]
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
+        run_concurrent_download(url, ydl_opts, concurrency, hooks, progress_bar)
         logging.info(f"✅ Playlist download completed successfully in: {VIDEO_FOLDER}")
         return VIDEO_FOLDER
     except yt_dlp.DownloadError as e:
         logging.error(f"❌ Playlist download error: {e}")
-        st.error(f"❌ Playlist download error: {e}")
+        report_error(progress_bar, f"❌ Playlist download error: {e}")
         return None
     except Exception as e:
         logging.error(f"❌ Unexpected error: {e}")
-        st.error(f"❌ Unexpected error: {e}")
+        report_error(progress_bar, f"❌ Unexpected error: {e}")
         return None
 
 # Function to download channel
-def download_channel(url, progress_bar=None, stop_event=None):
-    """Downloads videos from a YouTube channel."""
-    create_folders()  # Ensure folders exist
-
-    ydl_opts = {
-        'outtmpl': f'{VIDEO_FOLDER}/%(uploader)s/%(title)s.%(ext)s',  # Save in Videos subfolder
-        'format': 'bv*+ba/best',
-        'progress_hooks': [lambda d: update_progress(d, progress_bar, stop_event)] if progress_bar else [],
-    }
+def download_channel(url, progress_bar=None, stop_event=None, concurrency=4, fragments=8, use_aria2c=False):
+    """Downloads videos from a YouTube channel, fetching several videos at once."""
+    ydl_opts = _opts_video('bv*+ba/best', str(VIDEO_FOLDER / '%(uploader)s' / '%(title)s.%(ext)s'), fragments, use_aria2c)  # Save in Videos subfolder
+    hooks = [partial(check_cancelled, stop_event=stop_event)]
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
+        run_concurrent_download(url, ydl_opts, concurrency, hooks, progress_bar)
         logging.info(f"✅ Channel download completed successfully in: {VIDEO_FOLDER}")
         return VIDEO_FOLDER
     except yt_dlp.DownloadError as e:
         logging.error(f"❌ Channel download error: {e}")
-        st.error(f"❌ Channel download error: {e}")
+        report_error(progress_bar, f"❌ Channel download error: {e}")
         return None
     except Exception as e:
         logging.error(f"❌ Unexpected error: {e}")
-        st.error(f"❌ Unexpected error: {e}")
+        report_error(progress_bar, f"❌ Unexpected error: {e}")
         return None
 
-# Function to get YouTube thumbnail (with caching)
-thumbnail_cache = {}
-def get_youtube_thumbnail(url):
-    """Extracts the video ID from a YouTube URL and returns the thumbnail URL."""
+# Matches the 11-character video ID in watch, shorts and youtu.be URLs
+_YTID = re.compile(r'(?:v=|/shorts/|youtu\.be/)([A-Za-z0-9_-]{11})')
+
+# Function to parse a YouTube URL once (with caching)
+@st.cache_data(ttl=3600, max_entries=512)
+def _yt_info(url):
+    """Returns (video_id, maxres_thumbnail_url, default_thumbnail_url), or Nones if no ID is found."""
+    m = _YTID.search(url)
+    if not m:
+        return None, None, None
+    video_id = m.group(1)
+    return (
+        video_id,
+        f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
+        f"https://img.youtube.com/vi/{video_id}/default.jpg",
+    )
+
+# Keep-alive HTTP session shared by all thumbnail requests (survives script reruns)
+@st.cache_resource
+def get_http_session():
+    """Returns a requests.Session so thumbnail probes reuse one TLS connection."""
+    session = requests.Session()
+    session.headers['User-Agent'] = 'Mozilla/5.0'
+    return session
+
+# Function to check a thumbnail exists (maxresdefault is missing for some videos)
+@st.cache_data(ttl=3600, max_entries=512)
+def thumbnail_available(thumbnail_url):
+    """Returns True if a HEAD request for the thumbnail succeeds."""
     try:
-        if url in thumbnail_cache:
-            return thumbnail_cache[url]
-
-        parsed_url = urlparse(url)
-        if parsed_url.netloc in ['www.youtube.com', 'youtube.com', 'youtu.be']:
-            if 'youtube.com' in parsed_url.netloc:
-                if parsed_url.path == '/watch':
-                    video_id = parse_qs(parsed_url.query)['v'][0]
-                elif parsed_url.path.startswith('/shorts/'):
-                    video_id = parsed_url.path.split('/')[-1]
-                else:
-                    return None
-            elif 'youtu.be' in parsed_url.netloc:
-                video_id = parsed_url.path[1:]
-            else:
-                return None
-            thumbnail_url = f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg"
-            thumbnail_cache[url] = thumbnail_url
-            return thumbnail_url
-        else:
-            return None
-    except:
-        return None
+        return get_http_session().head(thumbnail_url, timeout=3).status_code == 200
+    except requests.RequestException:
+        return False
+
+# Shared state between a background download and the UI
+class DownloadJob:
+    """Tracks one background download; passed to the download functions as `progress_bar`."""
+
+    def __init__(self):
+        self.value = 0.0
+        self.errors = []
+        self.stop_event = threading.Event()
+        self.future = None
+
+    def progress(self, value):
+        """Records progress (mirrors `st.progress`) for the UI to poll."""
+        self.value = value
+
+    def error(self, message):
+        """Records an error (mirrors `st.error`) for the UI to show once the job ends."""
+        self.errors.append(message)
+
+# Background executor shared by every session (survives script reruns)
+@st.cache_resource
+def get_executor():
+    """Returns the pool that runs downloads off the Streamlit script thread."""
+    return ThreadPoolExecutor(max_workers=4)
+
+# Function to run the selected download on the background executor
+def run_download(selected_option, url, format_option, concurrency, fragments, use_aria2c, job):
+    """Calls the download function for `selected_option`, reporting through `job`."""
+    if selected_option in ["Download Video", "Download Video-only"]:
+        return download_best_stream(url, format_option=format_option, progress_bar=job, stop_event=job.stop_event, fragments=fragments, use_aria2c=use_aria2c)
+    elif selected_option == "Download Audio (MP3)":
+        return download_audio(url, progress_bar=job, stop_event=job.stop_event)
+    elif selected_option == "Download Playlist":
+        return download_playlist(url, progress_bar=job, stop_event=job.stop_event, concurrency=concurrency, fragments=fragments, use_aria2c=use_aria2c)
+    elif selected_option == "Download Channel":
+        return download_channel(url, progress_bar=job, stop_event=job.stop_event, concurrency=concurrency, fragments=fragments, use_aria2c=use_aria2c)
+    job.error("Invalid download option selected.")
+    return None
 
 # --- Streamlit UI Enhancements ---
 
 # Custom CSS for styling
-st.markdown("""
+_CSS = """
     <style>
     .stButton>button {
         background-color: #4CAF50;
@@ -218,7 +493,8 @@ st.markdown("""
         font-family: 'Arial', sans-serif;
     }
     </style>
-    """, unsafe_allow_html=True)
+    """
+st.markdown(_CSS, unsafe_allow_html=True)
 
 st.title("🎥 YouTube Downloader")
 
@@ -248,73 +524,102 @@ with st.sidebar:
     else:
         format_option = "bv*+ba/best"
 
+    # Number of videos fetched in parallel for playlists/channels
+    concurrency = 4
+    if selected_option in ["Download Playlist", "Download Channel"]:
+        concurrency = st.slider("Parallel downloads", min_value=1, max_value=8, value=4)
+
+    # Number of DASH/HLS fragments fetched in parallel per video
+    fragments = 8
+    if selected_option != "Download Audio (MP3)":
+        fragments = st.slider("Fragment concurrency", min_value=1, max_value=16, value=8)
+
+    # Optional external downloader; opt-in because it disables progress and Cancel
+    use_aria2c = False
+    if _HAS_ARIA2C and selected_option != "Download Audio (MP3)":
+        use_aria2c = st.checkbox(
+            "Use aria2c",
+            help="Faster on throttled links, but shows no progress and cannot be cancelled "
+                 "until the file finishes. Fragment concurrency is ignored.",
+        )
+
 # 2. Input Field with Placeholder and Validation
 url = st.text_input("Enter the YouTube URL:", placeholder="https://www.youtube.com/watch?v=dQw4w9WgXcQ")
 if url and ("youtube.com" not in url) and ("youtu.be" not in url):
     st.warning("Please enter a valid YouTube URL.")
 else:
     # Display Thumbnail
-    thumbnail_url = get_youtube_thumbnail(url)
+    video_id, thumbnail_url, default_thumbnail_url = _yt_info(url)
     if thumbnail_url:
-        try:
-            response = requests.get(thumbnail_url, stream=True)
-            if response.status_code == 200:
-                image = Image.open(response.raw)
-                st.image(image, width=200, caption="YouTube Thumbnail")
-            else:
-                st.warning("Could not fetch thumbnail. Using default thumbnail.")
-                # Fix the fallback thumbnail URL
-                video_id = parse_qs(urlparse(url).query).get('v', [''])[0]
-                thumbnail_url = f"https://img.youtube.com/vi/{video_id}/default.jpg"
-                response = requests.get(thumbnail_url, stream=True)
-                if response.status_code == 200:
-                    image = Image.open(response.raw)
-                    st.image(image, width=200, caption="YouTube Thumbnail")
-        except Exception as e:
-            st.warning(f"Could not display thumbnail: {e}")
+        if not thumbnail_available(thumbnail_url):
+            st.warning("Could not fetch thumbnail. Using default thumbnail.")
+            thumbnail_url = default_thumbnail_url
+        # Streamlit fetches and caches the image itself in the browser
+        st.image(thumbnail_url, width=200, caption="YouTube Thumbnail")
     else:
         st.warning("Could not fetch thumbnail. Please check the URL.")
 
-# 3. Download Button with Feedback
-if st.button("Download"):
-    if url:
-        stop_event = threading.Event()  # Event to signal cancellation
-        progress_bar = st.progress(0)  # Initialize progress bar
-        cancel_button = st.button("Cancel Download")  # Cancel button
-
-        with st.spinner("Downloading..."):
-            try:
-                # Call the appropriate download function
-                if selected_option == "Download Video":
-                    downloaded_file_path = download_best_stream(url, format_option=format_option, progress_bar=progress_bar, stop_event=stop_event)
-                elif selected_option == "Download Audio (MP3)":
-                    downloaded_file_path = download_audio(url, progress_bar=progress_bar, stop_event=stop_event)
-                elif selected_option == "Download Video-only":
-                    downloaded_file_path = download_best_stream(url, format_option=format_option, progress_bar=progress_bar, stop_event=stop_event)
-                elif selected_option == "Download Playlist":
-                    downloaded_file_path = download_playlist(url, progress_bar=progress_bar, stop_event=stop_event)
-                elif selected_option == "Download Channel":
-                    downloaded_file_path = download_channel(url, progress_bar=progress_bar, stop_event=stop_event)
-                else:
-                    downloaded_file_path = None
-                    st.error("Invalid download option selected.")
-
-                if cancel_button:
-                    stop_event.set()  # Signal cancellation
-                    st.warning("Download cancelled by user.")
-                elif downloaded_file_path:
-                    st.success("Download complete!")
-
-                    # Display downloaded file information with a download logo
-                    st.write("Downloaded File:")
-                    st.write(f"**Location:** {downloaded_file_path}")
-                    st.markdown(
-                        f'<a href="{downloaded_file_path}" download="{os.path.basename(downloaded_file_path)}">'
-                        f'<img src="https://img.icons8.com/fluency/48/000000/download.png" alt="Download" width="20" height="20"> Download File</a>',
-                        unsafe_allow_html=True,
-                    )
-
-            except Exception as e:
-                st.error(f"❌ An error occurred: {e}")
+# 3. Download Button with Feedback (one job per session at a time)
+previous_job = st.session_state.get("job")
+previous_running = previous_job is not None and not previous_job.future.done()
+if st.button("Download", disabled=previous_running):
+    if previous_running:
+        st.warning("A download is already running. Cancel it or wait for it to finish.")
+    elif url:
+        job = DownloadJob()
+        job.future = get_executor().submit(run_download, selected_option, url, format_option, concurrency, fragments, use_aria2c, job)
+        st.session_state.job = job
     else:
-        st.warning("Please enter a YouTube URL.")
\ No newline at end of file
+        st.warning("Please enter a YouTube URL.")
+
+# 4. Download status, polled while the background job is running
+job = st.session_state.get("job")
+job_running = job is not None and not job.future.done()
+
+@st.fragment(run_every=1 if job_running else None)
+def show_download_status():
+    """Renders progress and the cancel button, then the result once the job is done."""
+    if not job.future.done():
+        if not job.future.running():
+            st.info("Queued: waiting for a free download slot...")
+        st.progress(job.value)
+        if st.button("Cancel Download"):
+            job.stop_event.set()  # Signal cancellation
+            st.info("Cancelling download...")
+        return
+    if st.session_state.get("job_polling"):
+        # Full rerun so the fragment is rebuilt without the polling timer
+        st.session_state.job_polling = False
+        st.rerun()
+
+    if job.future.exception():
+        st.error(f"❌ An error occurred: {job.future.exception()}")
+    elif job.stop_event.is_set():
+        st.warning("Download cancelled by user.")
+    elif job.errors:
+        for message in job.errors:
+            st.error(message)
+    elif job.future.result():
+        downloaded_file_path = job.future.result()
+        st.success("Download complete!")
+
+        # Display downloaded file information and stream single files to the browser
+        st.write("Downloaded File:")
+        st.write(f"**Location:** {downloaded_file_path}")
+        if not downloaded_file_path.is_file():
+            return
+        if downloaded_file_path.stat().st_size < DOWNLOAD_BUTTON_LIMIT:
+            # download_button reads and hashes the whole file, so only offer it on
+            # the rerun right after completion or when explicitly asked for
+            if st.session_state.get("offered_job") is job and not st.button("Prepare file download"):
+                return
+            st.session_state.offered_job = job
+            mime = mimetypes.guess_type(downloaded_file_path.name)[0] or 'application/octet-stream'
+            with open(downloaded_file_path, 'rb') as f:
+                st.download_button("Download File", data=f, file_name=downloaded_file_path.name, mime=mime)
+        else:
+            st.info("This file is too large to send through the browser; copy it from the location above.")
+
+if job:
+    st.session_state.job_polling = job_running
+    show_download_status()
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""Loads the non-UI half of pytube_downloader with Streamlit and yt-dlp stubbed out."""
+import functools
+import os
+import sys
+import tempfile
+import types
+from pathlib import Path
+
+SOURCE = Path(__file__).resolve().parent.parent / "pytube_downloader.py"
+UI_MARKER = "# --- Streamlit UI Enhancements ---"
+
+
+class MutatingYoutubeDL:
+    """Mimics yt_dlp.YoutubeDL: keeps the caller's params dict and mutates it."""
+
+    def __init__(self, params):
+        self.params = params  # yt-dlp does `self.params = params`, no copy
+        params.setdefault('compat_opts', [])
+        params.setdefault('http_headers', {'User-Agent': 'stub'})
+        params.setdefault('js_runtimes', {'deno': {}})
+        self._progress_hooks = []
+        self._post_hooks = []
+
+    def add_progress_hook(self, hook):
+        self._progress_hooks.append(hook)
+
+    def add_post_hook(self, hook):
+        self._post_hooks.append(hook)
+
+    def close(self):
+        pass
+
+
+def load_module(youtube_dl_cls=MutatingYoutubeDL):
+    """Executes everything above the Streamlit UI section and returns it as a module."""
+    st = types.ModuleType('streamlit')
+    st.cache_resource = lambda func: functools.cache(func)
+    st.cache_data = lambda *args, **kwargs: (lambda func: func)
+    st.error = lambda message: None
+
+    yt_dlp = types.ModuleType('yt_dlp')
+    yt_dlp.DownloadError = type('DownloadError', (Exception,), {})
+    yt_dlp.YoutubeDL = youtube_dl_cls
+
+    sys.modules['streamlit'] = st
+    sys.modules['yt_dlp'] = yt_dlp
+    sys.modules.setdefault('requests', types.ModuleType('requests'))
+
+    source = SOURCE.read_text(encoding='utf-8')
+    source = source[:source.index(UI_MARKER)]
+    module = types.ModuleType('pytube_downloader')
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp())  # create_folders() runs at import
+    try:
+        exec(compile(source, str(SOURCE), 'exec'), module.__dict__)
+    finally:
+        os.chdir(cwd)
+    return module
@@ -0,0 +1,43 @@
+import unittest
+
+from _stubs import MutatingYoutubeDL, load_module
+
+
+class CachedYdlTest(unittest.TestCase):
+    def setUp(self):
+        self.created = []
+        created = self.created
+
+        class Recording(MutatingYoutubeDL):
+            def __init__(self, params):
+                super().__init__(params)
+                created.append(self)
+
+        self.pd = load_module(Recording)
+
+    def test_callers_dict_is_not_mutated(self):
+        opts = {'format': 'best', 'quiet': True}
+        with self.pd.cached_ydl({**opts, 'playlist_items': '1::2'}) as ydl:
+            self.assertIsNot(ydl.params, opts)
+        self.assertEqual(opts, {'format': 'best', 'quiet': True})
+
+    def test_pool_key_is_stable_across_checkouts_and_shards(self):
+        opts = {'format': 'best'}
+        for shard in ['1::4', '2::4', '3::4', '4::4', None]:
+            with self.pd.cached_ydl({**opts, 'playlist_items': shard}) as ydl:
+                self.assertEqual(ydl.params['playlist_items'], shard)
+        pool, _ = self.pd._ydl_pool()
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(len(pool), 1)
+        self.assertNotIn('playlist_items', next(iter(pool)))
+
+    def test_concurrent_checkouts_own_their_params(self):
+        opts = {'format': 'best'}
+        with self.pd.cached_ydl({**opts, 'playlist_items': '1::2'}) as first:
+            with self.pd.cached_ydl({**opts, 'playlist_items': '2::2'}) as second:
+                self.assertEqual(first.params['playlist_items'], '1::2')
+                self.assertEqual(second.params['playlist_items'], '2::2')
+
+
+if __name__ == '__main__':
+    unittest.main()
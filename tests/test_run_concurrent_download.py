@@ -0,0 +1,39 @@
+import threading
+import unittest
+
+from _stubs import MutatingYoutubeDL, load_module
+
+N_SHARDS = 4
+
+
+class ShardingTest(unittest.TestCase):
+    def setUp(self):
+        seen = self.seen = []
+        # Every shard reaches download() before any of them reads its params,
+        # like yt-dlp reading playlist_items only after extracting the playlist
+        barrier = threading.Barrier(N_SHARDS, timeout=5)
+
+        class Playlist(MutatingYoutubeDL):
+            def extract_info(self, url, download=False, process=True):
+                entries = [{'_type': 'url', 'ie_key': 'Youtube', 'url': f'v{i}'} for i in range(10)]
+                return {'_type': 'playlist', 'entries': iter(entries)}
+
+            def download(self, urls):
+                barrier.wait()
+                seen.append(self.params['playlist_items'])
+
+        self.pd = load_module(Playlist)
+
+    def run_playlist(self):
+        self.seen.clear()
+        self.pd.run_concurrent_download('playlist', {'format': 'best'}, concurrency=N_SHARDS)
+        return sorted(self.seen)
+
+    def test_each_shard_downloads_its_own_range(self):
+        expected = [f"{i}::{N_SHARDS}" for i in range(1, N_SHARDS + 1)]
+        self.assertEqual(self.run_playlist(), expected)  # cold pool
+        self.assertEqual(self.run_playlist(), expected)  # warm pool
+
+
+if __name__ == '__main__':
+    unittest.main()